@@ -0,0 +1,244 @@
+"""
+Admission control for the Flask API.
+Per-client token-bucket rate limits, bounded worker slots and wait queues per
+route class, fast 429/503 shedding with Retry-After, and queue metrics.
+"""
+
+import math, os, threading, time
+from collections import OrderedDict
+from flask import g, request, jsonify
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (ValueError, TypeError):
+        return float(default)
+
+
+class TokenBucket:
+    """Classic token bucket: refills at `rate` tokens/s up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost=1.0):
+        """Return (allowed, retry_after_seconds). Caller holds the lock."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True, 0.0
+        return False, (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    One token bucket per client, kept in least-recently-used order. Idle
+    buckets are pruned first; if the table is still full the oldest is evicted.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.limited = 0
+        self.lock = threading.Lock()
+
+    def allow(self, client, cost=1.0):
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                if len(self.buckets) >= self.max_clients:
+                    self._prune()
+                bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+            else:
+                self.buckets.move_to_end(client)
+            ok, retry_after = bucket.take(cost)
+            if not ok:
+                self.limited += 1
+            return ok, retry_after
+
+    def _prune(self):
+        now = time.monotonic()
+        idle = self.burst / self.rate
+        while self.buckets:
+            oldest = next(iter(self.buckets.values()))
+            if now - oldest.updated < idle and len(self.buckets) < self.max_clients:
+                break
+            self.buckets.popitem(last=False)
+
+    def snapshot(self):
+        with self.lock:
+            return {"clients": len(self.buckets), "rate_limited": self.limited}
+
+
+class RouteClass:
+    """
+    A bounded pool of worker slots with a bounded wait queue in front of it.
+    Requests beyond `workers + max_queue` are shed immediately; queued requests
+    that wait longer than `max_wait` seconds are shed as well.
+    """
+
+    def __init__(self, name, workers, max_queue, max_wait, cost=1.0, rate_limited=True):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.cost = cost
+        self.rate_limited = rate_limited
+        self.cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_full = 0
+        self.shed_timeout = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.service_total = 0.0
+        self.completed = 0
+
+    def acquire(self):
+        """Block for a free slot. Return (admitted, waited_seconds)."""
+        start = time.monotonic()
+        with self.cond:
+            if self.active < self.workers and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return True, 0.0
+            if self.waiting >= self.max_queue:
+                self.shed_full += 1
+                return False, 0.0
+            self.waiting += 1
+            deadline = start + self.max_wait
+            try:
+                while self.active >= self.workers:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self.cond.wait(remaining):
+                        if self.active < self.workers:
+                            break
+                        self.shed_timeout += 1
+                        return False, time.monotonic() - start
+            finally:
+                self.waiting -= 1
+            waited = time.monotonic() - start
+            self.active += 1
+            self.admitted += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            return True, waited
+
+    def release(self, service_time):
+        with self.cond:
+            self.active -= 1
+            self.completed += 1
+            self.service_total += service_time
+            self.cond.notify()
+
+    def retry_after(self):
+        """Rough estimate of how long until a slot frees up, in whole seconds."""
+        with self.cond:
+            avg = self.service_total / self.completed if self.completed else 1.0
+            backlog = (self.waiting + self.active) / max(self.workers, 1)
+        return max(1, math.ceil(avg * backlog))
+
+    def snapshot(self):
+        with self.cond:
+            return {
+                "workers": self.workers,
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "queue_limit": self.max_queue,
+                "admitted": self.admitted,
+                "shed_queue_full": self.shed_full,
+                "shed_timeout": self.shed_timeout,
+                "avg_wait_ms": round(1000 * self.wait_total / self.admitted, 2) if self.admitted else 0.0,
+                "max_wait_ms": round(1000 * self.wait_max, 2),
+                "avg_service_ms": round(1000 * self.service_total / self.completed, 2) if self.completed else 0.0,
+            }
+
+
+class AdmissionControl:
+    """Flask extension gating every API request through its route class."""
+
+    def __init__(self, app=None, route_classes=None, endpoint_classes=None, default_class="light"):
+        self.classes = route_classes or {
+            # Health checks never queue behind other work and are not rate limited,
+            # so the load balancer keeps seeing us as healthy under saturation.
+            "health": RouteClass("health", workers=8, max_queue=16, max_wait=0.5, cost=0.0, rate_limited=False),
+            "light": RouteClass(
+                "light",
+                workers=int(_env_float("ADMISSION_LIGHT_WORKERS", 8)),
+                max_queue=int(_env_float("ADMISSION_LIGHT_QUEUE", 32)),
+                max_wait=_env_float("ADMISSION_LIGHT_MAX_WAIT", 2.0),
+            ),
+            "heavy": RouteClass(
+                "heavy",
+                workers=int(_env_float("ADMISSION_HEAVY_WORKERS", 2)),
+                max_queue=int(_env_float("ADMISSION_HEAVY_QUEUE", 8)),
+                max_wait=_env_float("ADMISSION_HEAVY_MAX_WAIT", 5.0),
+                cost=4.0,
+            ),
+        }
+        self.endpoint_classes = endpoint_classes or {
+            "health": "health",
+            "metrics": "health",
+            "predict": "heavy",
+        }
+        self.default_class = default_class
+        self.limiter = RateLimiter(
+            rate=_env_float("RATE_LIMIT_RPS", 5.0),
+            burst=_env_float("RATE_LIMIT_BURST", 20.0),
+        )
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.teardown_request(self._teardown)
+        app.extensions["admission"] = self
+
+    @staticmethod
+    def client_id():
+        # X-Forwarded-For is client controlled; wrap the app in ProxyFix with the
+        # number of trusted proxy hops so remote_addr is the real peer address.
+        return request.remote_addr or "unknown"
+
+    def _reject(self, status, message, retry_after):
+        resp = jsonify({"error": message})
+        resp.status_code = status
+        resp.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return resp
+
+    def _before(self):
+        if request.method == "OPTIONS" or request.endpoint is None:
+            return None
+        rc = self.classes[self.endpoint_classes.get(request.endpoint, self.default_class)]
+
+        if rc.rate_limited:
+            ok, retry_after = self.limiter.allow(self.client_id(), rc.cost)
+            if not ok:
+                return self._reject(429, "Rate limit exceeded", retry_after)
+
+        ok, _ = rc.acquire()
+        if not ok:
+            return self._reject(503, "Server busy", rc.retry_after())
+        g.admission_class = rc
+        g.admission_start = time.monotonic()
+        return None
+
+    def _teardown(self, exc):
+        rc = g.pop("admission_class", None)
+        if rc is not None:
+            rc.release(time.monotonic() - g.pop("admission_start"))
+
+    def snapshot(self):
+        return {
+            "route_classes": {name: rc.snapshot() for name, rc in self.classes.items()},
+            "rate_limiter": self.limiter.snapshot(),
+        }
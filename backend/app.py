@@ -7,20 +7,47 @@ import os, json, pickle, sqlite3, numpy as np
 from pathlib import Path
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from admission import AdmissionControl
+from bundle import ServingBundle
 
 app = Flask(__name__)
+# Number of proxies in front of us that append to X-Forwarded-For (1 on Render)
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.environ.get("TRUSTED_PROXY_HOPS", 0)))
 CORS(app)
+admission = AdmissionControl(app)
 
 DB_PATH = Path(__file__).parent / "data" / "processed" / "matches.db"
 MODEL_PATH = Path(__file__).parent / "models" / "model_numpy.pkl"
 META_PATH = Path(__file__).parent / "models" / "model_meta.json"
+BUNDLE_PATH = Path(os.environ.get("BUNDLE_PATH", Path(__file__).parent / "data" / "serving.bundle"))
 
-with open(MODEL_PATH, "rb") as f:
-    artifact = pickle.load(f)
 
-W, b, mean, std, feature_cols = artifact["W"], artifact["b"], artifact["mean"], artifact["std"], artifact["feature_cols"]
-with open(META_PATH, "r") as f:
-    model_meta = json.load(f)
+def load_bundle():
+    """Open the memory-mapped bundle (tools/build_bundle.py) unless it is missing or stale."""
+    if not BUNDLE_PATH.exists():
+        return None
+    bundle = ServingBundle(BUNDLE_PATH)
+    stale = bundle.stale_sources(Path(__file__).parent)
+    if stale:
+        app.logger.warning("Bundle %s does not match current %s; serving from SQLite + pickle. "
+                           "Re-run tools/build_bundle.py.", bundle.version, ", ".join(stale))
+        return None
+    return bundle
+
+
+# Prefer the memory-mapped bundle; fall back to SQLite + pickle
+bundle = load_bundle()
+
+if bundle is not None:
+    W, b, mean, std, feature_cols = bundle.W, bundle.b, bundle.mean, bundle.std, bundle.feature_cols
+    model_meta = bundle.model_meta
+else:
+    with open(MODEL_PATH, "rb") as f:
+        artifact = pickle.load(f)
+    W, b, mean, std, feature_cols = artifact["W"], artifact["b"], artifact["mean"], artifact["std"], artifact["feature_cols"]
+    with open(META_PATH, "r") as f:
+        model_meta = json.load(f)
 
 
 def softmax(z):
@@ -36,6 +63,8 @@ def safe_float(v):
 
 
 def get_team_stats(team_name, is_home):
+    if bundle is not None:
+        return bundle.team_stats(team_name, is_home)
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
 
@@ -56,20 +85,23 @@ def get_team_stats(team_name, is_home):
 
 def get_recent_matches(team_name, limit=5):
     """Get the last N matches for a team with full details."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    if bundle is not None:
+        rows = bundle.recent_matches(team_name, limit)
+    else:
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
 
-    c.execute("""
-        SELECT Date, HomeTeam, AwayTeam, FTHG, FTAG, FTR, FTR as result,
-               CASE WHEN HomeTeam = ? THEN 'H' ELSE 'A' END as venue
-        FROM matches
-        WHERE HomeTeam = ? OR AwayTeam = ?
-        ORDER BY Date DESC
-        LIMIT ?
-    """, (team_name, team_name, team_name, limit))
+        c.execute("""
+            SELECT Date, HomeTeam, AwayTeam, FTHG, FTAG, FTR, FTR as result,
+                   CASE WHEN HomeTeam = ? THEN 'H' ELSE 'A' END as venue
+            FROM matches
+            WHERE HomeTeam = ? OR AwayTeam = ?
+            ORDER BY Date DESC
+            LIMIT ?
+        """, (team_name, team_name, team_name, limit))
 
-    rows = c.fetchall()
-    conn.close()
+        rows = c.fetchall()
+        conn.close()
 
     matches = []
     for r in rows:
@@ -95,17 +127,20 @@ def get_recent_matches(team_name, limit=5):
 
 
 def get_h2h_history(home, away, limit=5):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        SELECT Date, HomeTeam, AwayTeam, FTHG, FTAG, FTR
-        FROM matches
-        WHERE ((HomeTeam = ? AND AwayTeam = ?) OR (HomeTeam = ? AND AwayTeam = ?))
-        ORDER BY Date DESC
-        LIMIT ?
-    """, (home, away, away, home, limit))
-    rows = c.fetchall()
-    conn.close()
+    if bundle is not None:
+        rows = bundle.h2h_history(home, away, limit)
+    else:
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute("""
+            SELECT Date, HomeTeam, AwayTeam, FTHG, FTAG, FTR
+            FROM matches
+            WHERE ((HomeTeam = ? AND AwayTeam = ?) OR (HomeTeam = ? AND AwayTeam = ?))
+            ORDER BY Date DESC
+            LIMIT ?
+        """, (home, away, away, home, limit))
+        rows = c.fetchall()
+        conn.close()
 
     return [{
         "date": r[0], "home_team": r[1], "away_team": r[2],
@@ -126,11 +161,23 @@ def get_h2h_features(home, away):
 
 @app.route("/api/health", methods=["GET"])
 def health():
-    return jsonify({"status": "healthy", "model_loaded": True, "feature_count": len(feature_cols)})
+    return jsonify({
+        "status": "healthy",
+        "model_loaded": True,
+        "feature_count": len(feature_cols),
+        "bundle_version": bundle.version if bundle is not None else None,
+    })
+
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    return jsonify(admission.snapshot())
 
 
 @app.route("/api/teams", methods=["GET"])
 def get_teams():
+    if bundle is not None:
+        return jsonify({"teams": sorted(bundle.teams)})
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute("SELECT name FROM teams ORDER BY name")
@@ -248,4 +295,4 @@ def predict():
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port, debug=False)
+    app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
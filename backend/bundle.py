@@ -0,0 +1,145 @@
+"""
+Memory-mapped serving bundle.
+A single read-only, checksummed file with everything the API serves: team
+snapshots, recent form, H2H history, team ids and model weights. Arrays are
+views straight into the mapping, so every worker on a host shares the same
+page-cache pages. Built by tools/build_bundle.py.
+
+Layout: preamble (magic, format version, header length, sha256 of the rest),
+JSON header, then 64-byte aligned arrays at the offsets listed in the header.
+"""
+
+import hashlib, json, mmap, os, struct
+import numpy as np
+
+MAGIC = b"VARBNDL\0"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<8sII32s")
+ALIGN = 64
+
+# Files a bundle is compiled from, relative to backend/
+SOURCE_FILES = ("data/processed/matches.db", "models/model_numpy.pkl", "models/model_meta.json")
+
+
+class BundleError(Exception):
+    pass
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_digests(root):
+    """sha256 of each source file under `root` that exists."""
+    return {name: file_digest(os.path.join(root, name))
+            for name in SOURCE_FILES if os.path.exists(os.path.join(root, name))}
+
+
+def write_bundle(path, header, arrays):
+    """Write a bundle next to `path` and atomically swap it into place."""
+    layout, data = {}, bytearray()
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        data.extend(b"\0" * (_align(len(data)) - len(data)))
+        layout[name] = {"offset": len(data), "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        data.extend(arr.tobytes())
+
+    header = dict(header, arrays=layout)
+    header_bytes = json.dumps(header, sort_keys=True).encode()
+    pad = _align(PREAMBLE.size + len(header_bytes)) - PREAMBLE.size - len(header_bytes)
+    body = header_bytes + b"\0" * pad + bytes(data)
+    digest = hashlib.sha256(body).digest()
+    preamble = PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes), digest)
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(preamble)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return digest.hex()[:16]
+
+
+class ServingBundle:
+    """Read-only view over a bundle file. Lookups mirror the SQLite queries in app.py."""
+
+    def __init__(self, path, verify=True):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < PREAMBLE.size:
+                raise BundleError(f"{path}: truncated bundle")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, header_len, digest = PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise BundleError(f"{path}: not a serving bundle")
+        if fmt != FORMAT_VERSION:
+            raise BundleError(f"{path}: format version {fmt}, expected {FORMAT_VERSION}")
+        if verify:
+            with memoryview(self._mm) as view:
+                if hashlib.sha256(view[PREAMBLE.size:]).digest() != digest:
+                    raise BundleError(f"{path}: checksum mismatch")
+
+        self.header = json.loads(self._mm[PREAMBLE.size:PREAMBLE.size + header_len])
+        data_start = _align(PREAMBLE.size + header_len)
+        self.arrays = {}
+        for name, spec in self.header["arrays"].items():
+            shape = tuple(spec["shape"])
+            self.arrays[name] = np.frombuffer(
+                self._mm, dtype=spec["dtype"], count=int(np.prod(shape)),
+                offset=data_start + spec["offset"],
+            ).reshape(shape)
+
+        # Digest covers the header and every array, so any rebuild change shows up
+        self.version = digest.hex()[:16]
+        self.sources = self.header.get("sources", {})
+        self.teams = self.header["teams"]
+        self.team_ids = {t: i for i, t in enumerate(self.teams)}
+        self.stat_cols = self.header["stat_cols"]
+        self.feature_cols = self.header["feature_cols"]
+        self.model_meta = self.header["model_meta"]
+        self.W, self.b = self.arrays["W"], self.arrays["b"]
+        self.mean, self.std = self.arrays["mean"], self.arrays["std"]
+
+    def stale_sources(self, root):
+        """Source files under `root` whose contents changed since the bundle was built."""
+        return sorted(name for name, d in source_digests(root).items() if self.sources.get(name) != d)
+
+    def team_stats(self, team_name, is_home):
+        """Stats row from the team's latest home (or away) match, or None."""
+        i = self.team_ids.get(team_name)
+        venue = "home" if is_home else "away"
+        if i is None or not self.arrays[f"has_{venue}_stats"][i]:
+            return None
+        return dict(zip(self.stat_cols, self.arrays[f"{venue}_stats"][i].tolist()))
+
+    def _match_rows(self, idx):
+        a = self.arrays
+        return [(
+            a["match_date"][m].decode(), self.teams[a["match_home"][m]], self.teams[a["match_away"][m]],
+            float(a["match_fthg"][m]), float(a["match_ftag"][m]), a["match_ftr"][m].decode(),
+        ) for m in idx.tolist()]
+
+    def recent_matches(self, team_name, limit=5):
+        """(Date, HomeTeam, AwayTeam, FTHG, FTAG, FTR) rows, newest first."""
+        i = self.team_ids.get(team_name)
+        if i is None:
+            return []
+        off = self.arrays["recent_offsets"]
+        return self._match_rows(self.arrays["recent_index"][off[i]:off[i + 1]][:limit])
+
+    def h2h_history(self, home, away, limit=5):
+        """Meetings between two teams at either venue, newest first."""
+        i, j = self.team_ids.get(home), self.team_ids.get(away)
+        if i is None or j is None:
+            return []
+        pair = min(i, j) * len(self.teams) + max(i, j)
+        off = self.arrays["h2h_offsets"]
+        return self._match_rows(self.arrays["h2h_index"][off[pair]:off[pair + 1]][:limit])
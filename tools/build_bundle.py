@@ -0,0 +1,149 @@
+"""
+Build the memory-mapped serving bundle for the backend.
+
+Compiles everything the API reads at request time -- latest team stats,
+recent-form lists, head-to-head history, the team-id dictionary and the
+model weights / normalization vectors -- into one versioned, checksummed
+file that the backend maps read-only at startup.
+
+Usage:
+    python tools/build_bundle.py
+
+Output:
+    - backend/data/serving.bundle  (swapped in atomically)
+"""
+
+import json
+import pickle
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT = Path(__file__).parent.parent
+DB_PATH = PROJECT / "backend" / "data" / "processed" / "matches.db"
+MODEL_PATH = PROJECT / "backend" / "models" / "model_numpy.pkl"
+META_PATH = PROJECT / "backend" / "models" / "model_meta.json"
+BUNDLE_PATH = PROJECT / "backend" / "data" / "serving.bundle"
+
+sys.path.insert(0, str(PROJECT / "backend"))
+from bundle import source_digests, write_bundle  # noqa: E402
+
+# The API only ever shows the last 5 matches / meetings
+HISTORY_LIMIT = 5
+NON_STAT_COLS = {"Date", "HomeTeam", "AwayTeam", "FTR"}
+
+
+def safe_float(v):
+    """Same coercion the API applies to stats read from SQLite."""
+    try:
+        return float(v) if v is not None else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def load_matches():
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT * FROM matches ORDER BY Date DESC, rowid DESC")
+    rows = c.fetchall()
+    cols = [d[0] for d in c.description]
+    c.execute("SELECT name FROM teams ORDER BY name")
+    teams = [r[0] for r in c.fetchall()]
+    conn.close()
+    return cols, rows, teams
+
+
+def csr(groups, n_groups):
+    """Pack per-group index lists into (offsets, flat index) arrays."""
+    offsets = np.zeros(n_groups + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(g) for g in groups])
+    flat = np.array([m for g in groups for m in g], dtype=np.int32)
+    return offsets, flat
+
+
+def build():
+    cols, rows, teams = load_matches()
+    if not rows:
+        print("No data found! Run fetch_data.py first.")
+        return
+
+    # Teams that only appear in matches still need an id
+    seen = {r[cols.index(k)] for r in rows for k in ("HomeTeam", "AwayTeam")}
+    teams = teams + sorted(seen - set(teams))
+    team_ids = {t: i for i, t in enumerate(teams)}
+    n_teams = len(teams)
+
+    col = {c: i for i, c in enumerate(cols)}
+    stat_cols = [c for c in cols if c not in NON_STAT_COLS]
+    home = np.array([team_ids[r[col["HomeTeam"]]] for r in rows], dtype=np.int16)
+    away = np.array([team_ids[r[col["AwayTeam"]]] for r in rows], dtype=np.int16)
+
+    # Team snapshot: stats row of each team's latest home and latest away match
+    snapshots = {}
+    for venue, side in (("home", home), ("away", away)):
+        stats = np.zeros((n_teams, len(stat_cols)))
+        has = np.zeros(n_teams, dtype=np.int8)
+        for m, t in enumerate(side.tolist()):
+            if not has[t]:
+                stats[t] = [safe_float(rows[m][col[c]]) for c in stat_cols]
+                has[t] = 1
+        snapshots[f"{venue}_stats"] = stats
+        snapshots[f"has_{venue}_stats"] = has
+
+    # Recent form and H2H: indices into the match table, newest first
+    recent = [[] for _ in range(n_teams)]
+    h2h = [[] for _ in range(n_teams * n_teams)]
+    for m, (h, a) in enumerate(zip(home.tolist(), away.tolist())):
+        for t in (h, a):
+            if len(recent[t]) < HISTORY_LIMIT:
+                recent[t].append(m)
+        pair = min(h, a) * n_teams + max(h, a)
+        if len(h2h[pair]) < HISTORY_LIMIT:
+            h2h[pair].append(m)
+    recent_offsets, recent_index = csr(recent, n_teams)
+    h2h_offsets, h2h_index = csr(h2h, n_teams * n_teams)
+
+    # Only matches referenced by recent form or H2H need to ship
+    used = np.unique(np.concatenate([recent_index, h2h_index]))
+    remap = np.zeros(len(rows), dtype=np.int32)
+    remap[used] = np.arange(len(used), dtype=np.int32)
+
+    with open(MODEL_PATH, "rb") as f:
+        artifact = pickle.load(f)
+    with open(META_PATH, "r") as f:
+        model_meta = json.load(f)
+
+    arrays = {
+        **snapshots,
+        "recent_offsets": recent_offsets,
+        "recent_index": remap[recent_index],
+        "h2h_offsets": h2h_offsets,
+        "h2h_index": remap[h2h_index],
+        "match_date": np.array([str(rows[m][col["Date"]])[:10] for m in used], dtype="S10"),
+        "match_home": home[used],
+        "match_away": away[used],
+        "match_fthg": np.array([rows[m][col["FTHG"]] for m in used], dtype=np.float64),
+        "match_ftag": np.array([rows[m][col["FTAG"]] for m in used], dtype=np.float64),
+        "match_ftr": np.array([rows[m][col["FTR"]] for m in used], dtype="S1"),
+        "W": np.asarray(artifact["W"], dtype=np.float64),
+        "b": np.asarray(artifact["b"], dtype=np.float64),
+        "mean": np.asarray(artifact["mean"], dtype=np.float64),
+        "std": np.asarray(artifact["std"], dtype=np.float64),
+    }
+    header = {
+        "teams": teams,
+        "stat_cols": stat_cols,
+        "feature_cols": list(artifact["feature_cols"]),
+        "model_meta": model_meta,
+        "sources": source_digests(PROJECT / "backend"),
+    }
+
+    version = write_bundle(BUNDLE_PATH, header, arrays)
+    print(f"  {n_teams} teams, {len(used)} matches, {len(stat_cols)} stat columns")
+    print(f"  Saved bundle {version} to {BUNDLE_PATH} ({BUNDLE_PATH.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    build()
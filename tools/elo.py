@@ -0,0 +1,214 @@
+"""
+Elo Rating Engine
+=================
+
+Computes pre-match Elo ratings in a single chronological pass over
+integer-indexed NumPy arrays, and tunes K-factor, home advantage and
+between-season regression with a grid search.
+
+The grid search is vectorized across the parameter axis: every config's
+ratings live in one (n_configs, n_teams) matrix that is updated match by
+match, so a sweep over hundreds of configs costs about the same number of
+Python-level steps as a single run. Large grids can additionally be split
+across a process pool with --workers.
+
+Implied 3-way probabilities use the Davidson extension of Elo, with the draw
+parameter set from the empirical draw rate, and configs are ranked by the
+log loss of those probabilities.
+
+Usage:
+    python tools/elo.py
+    python tools/elo.py --k 10 15 20 25 30 --home-adv 0 25 50 75 --regression 0 0.2 0.33
+
+Defaults (K=20, no home advantage, no regression) reproduce the
+home_elo/away_elo columns stored in matches.db.
+"""
+
+import argparse
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+PROJECT = Path(__file__).parent.parent
+DB_PATH = PROJECT / "backend" / "data" / "processed" / "matches.db"
+
+INITIAL_RATING = 1500.0
+DEFAULT_K = 20.0
+DEFAULT_HOME_ADV = 0.0
+DEFAULT_REGRESSION = 0.0
+
+# Outcome index matches the `target` column: H=0, D=1, A=2
+RESULT_INDEX = {"H": 0, "D": 1, "A": 2}
+RESULT_SCORE = np.array([1.0, 0.5, 0.0])
+
+
+def season_index(dates) -> np.ndarray:
+    """Map match dates to 0-based season ids (a season starts in July)."""
+    days = np.asarray(dates, dtype="datetime64[D]")
+    year = days.astype("datetime64[Y]").astype(np.int64) + 1970
+    month = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    start_year = year - (month < 7)
+    return np.unique(start_year, return_inverse=True)[1].astype(np.int32)
+
+
+def encode_matches(dates, home_teams, away_teams, results) -> dict:
+    """
+    Turn chronologically ordered match rows into integer-indexed arrays.
+    Team names are replaced by ids into the returned `teams` array.
+    """
+    home_teams = np.asarray(home_teams, dtype=object)
+    away_teams = np.asarray(away_teams, dtype=object)
+    n = len(home_teams)
+    teams, idx = np.unique(np.concatenate([home_teams, away_teams]).astype(str), return_inverse=True)
+    return {
+        "teams": teams,
+        "home": idx[:n].astype(np.int32),
+        "away": idx[n:].astype(np.int32),
+        "outcome": np.array([RESULT_INDEX[r] for r in results], dtype=np.int8),
+        "season": season_index(dates),
+    }
+
+
+def compute_ratings(matches: dict, k=DEFAULT_K, home_adv=DEFAULT_HOME_ADV,
+                    regression=DEFAULT_REGRESSION, initial=INITIAL_RATING):
+    """
+    Pre-match ratings for one or many configs in one chronological pass.
+
+    `k`, `home_adv` and `regression` are scalars or equal-length 1-D arrays
+    (one entry per config). At each new season every rating is pulled
+    `regression` of the way back towards `initial`.
+
+    Returns (home_elo, away_elo), each of shape (n_matches, n_configs).
+    """
+    k, home_adv, regression = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(k, dtype=float)),
+        np.atleast_1d(np.asarray(home_adv, dtype=float)),
+        np.atleast_1d(np.asarray(regression, dtype=float)),
+    )
+    n_configs = len(k)
+    n = len(matches["home"])
+    keep = (1.0 - regression)[:, None]
+
+    ratings = np.full((n_configs, len(matches["teams"])), initial)
+    home_elo = np.empty((n, n_configs))
+    away_elo = np.empty((n, n_configs))
+
+    # Plain lists are much cheaper to index element-wise than NumPy arrays
+    home = matches["home"].tolist()
+    away = matches["away"].tolist()
+    score = RESULT_SCORE[matches["outcome"]].tolist()
+    season = matches["season"].tolist()
+    current = season[0] if n else 0
+
+    for i in range(n):
+        if season[i] != current:
+            ratings = initial + keep * (ratings - initial)
+            current = season[i]
+        h, a = home[i], away[i]
+        rh = home_elo[i] = ratings[:, h]
+        ra = away_elo[i] = ratings[:, a]
+        delta = k * (score[i] - 1.0 / (1.0 + 10.0 ** ((ra - rh - home_adv) / 400.0)))
+        ratings[:, h] += delta
+        ratings[:, a] -= delta
+
+    return home_elo, away_elo
+
+
+def draw_parameter(outcome: np.ndarray) -> float:
+    """Davidson draw parameter giving the empirical draw rate between equal teams."""
+    draw_rate = float(np.mean(outcome == RESULT_INDEX["D"]))
+    return 2.0 * draw_rate / (1.0 - draw_rate)
+
+
+def outcome_probabilities(home_elo, away_elo, home_adv=DEFAULT_HOME_ADV, draw_nu=0.0):
+    """Implied (home, draw, away) probabilities, stacked on a new last axis."""
+    d = (home_elo + home_adv - away_elo) / 800.0
+    ph = 10.0 ** d
+    pa = 10.0 ** -d
+    total = ph + pa + draw_nu
+    return np.stack([ph / total, np.full_like(ph, draw_nu) / total, pa / total], axis=-1)
+
+
+def elo_log_loss(matches: dict, home_elo, away_elo, home_adv, burn_in=380, draw_nu=None):
+    """Mean log loss per config over matches after the first `burn_in`."""
+    outcome = matches["outcome"][burn_in:]
+    if draw_nu is None:
+        draw_nu = draw_parameter(outcome)
+    p = outcome_probabilities(home_elo[burn_in:], away_elo[burn_in:], home_adv, draw_nu)
+    picked = np.take_along_axis(p, outcome.astype(np.intp)[:, None, None], axis=2)[..., 0]
+    return -np.mean(np.log(np.clip(picked, 1e-15, 1.0)), axis=0)
+
+
+def _evaluate(matches, k, home_adv, regression, burn_in):
+    home_elo, away_elo = compute_ratings(matches, k, home_adv, regression)
+    return elo_log_loss(matches, home_elo, away_elo, home_adv, burn_in)
+
+
+def grid_search(matches: dict, ks, home_advs, regressions, burn_in=380, workers=1) -> list:
+    """
+    Evaluate every (K, home advantage, regression) combination.
+    Returns one dict per config, best (lowest log loss) first.
+    """
+    k, h, r = (a.ravel() for a in np.meshgrid(
+        np.asarray(ks, dtype=float),
+        np.asarray(home_advs, dtype=float),
+        np.asarray(regressions, dtype=float),
+        indexing="ij",
+    ))
+
+    if workers > 1 and len(k) > 1:
+        chunks = np.array_split(np.arange(len(k)), min(workers, len(k)))
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [pool.submit(_evaluate, matches, k[c], h[c], r[c], burn_in) for c in chunks]
+            losses = np.concatenate([f.result() for f in futures])
+    else:
+        losses = _evaluate(matches, k, h, r, burn_in)
+
+    results = [
+        {"k": float(k[i]), "home_adv": float(h[i]), "regression": float(r[i]), "log_loss": float(losses[i])}
+        for i in range(len(k))
+    ]
+    results.sort(key=lambda x: x["log_loss"])
+    return results
+
+
+def load_matches(db_path: Path = DB_PATH) -> dict:
+    """Load match results from the processed database in chronological order."""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("SELECT Date, HomeTeam, AwayTeam, FTR FROM matches ORDER BY Date, rowid")
+    rows = c.fetchall()
+    conn.close()
+
+    dates, home, away, results = zip(*rows)
+    return encode_matches([d[:10] for d in dates], home, away, results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elo K-factor / home-advantage / regression sweep")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--k", type=float, nargs="+", default=[10, 15, 20, 25, 30, 40])
+    parser.add_argument("--home-adv", type=float, nargs="+", default=[0, 25, 50, 75, 100])
+    parser.add_argument("--regression", type=float, nargs="+", default=[0, 0.1, 0.2, 0.33, 0.5])
+    parser.add_argument("--burn-in", type=int, default=380, help="matches skipped before scoring")
+    parser.add_argument("--workers", type=int, default=1, help="processes to split the grid across")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    matches = load_matches(args.db)
+    print(f"Loaded {len(matches['home'])} matches, {len(matches['teams'])} teams")
+
+    results = grid_search(matches, args.k, args.home_adv, args.regression, args.burn_in, args.workers)
+    print(f"Evaluated {len(results)} configs\n")
+    print(f"  {'K':>6} {'home_adv':>9} {'regression':>11} {'log_loss':>9}")
+    for res in results[:args.top]:
+        print(f"  {res['k']:>6.1f} {res['home_adv']:>9.1f} {res['regression']:>11.2f} {res['log_loss']:>9.4f}")
+
+    default = _evaluate(matches, DEFAULT_K, DEFAULT_HOME_ADV, DEFAULT_REGRESSION, args.burn_in)[0]
+    print(f"\n  Current (K={DEFAULT_K:g}, home_adv={DEFAULT_HOME_ADV:g}, regression={DEFAULT_REGRESSION:g}): {default:.4f}")
+
+
+if __name__ == "__main__":
+    main()
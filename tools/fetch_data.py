@@ -21,6 +21,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from elo import encode_matches, compute_ratings, DEFAULT_K, DEFAULT_HOME_ADV, DEFAULT_REGRESSION
+
 # Seasons to download (format: start_year_end_year, e.g., "2324" = 2023-24)
 SEASONS = [
     "1516", "1617", "1718", "1819", "1920",
@@ -240,6 +242,18 @@ def compute_head_to_head(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def add_elo_features(df: pd.DataFrame, k: float = DEFAULT_K, home_adv: float = DEFAULT_HOME_ADV,
+                     regression: float = DEFAULT_REGRESSION) -> pd.DataFrame:
+    """Add pre-match Elo ratings. Tune k/home_adv/regression with tools/elo.py."""
+    df = df.sort_values("Date", kind="mergesort").reset_index(drop=True)
+    matches = encode_matches(df["Date"].to_numpy(), df["HomeTeam"], df["AwayTeam"], df["FTR"])
+    home_elo, away_elo = compute_ratings(matches, k, home_adv, regression)
+    df["home_elo"] = home_elo[:, 0]
+    df["away_elo"] = away_elo[:, 0]
+    df["elo_diff"] = df["home_elo"] - df["away_elo"]
+    return df
+
+
 def save_to_sqlite(df: pd.DataFrame, db_path: Path):
     """Save processed data to SQLite."""
     conn = sqlite3.connect(db_path)
@@ -295,6 +309,10 @@ def main():
     featured = featured.dropna()
     print(f"Final matches with features: {len(featured)}")
 
+    # Elo runs over the same post-dropna rows tools/elo.py tunes on
+    print("\nComputing Elo ratings...")
+    featured = add_elo_features(featured)
+
     print("\nSaving to SQLite...")
     db_path = PROCESSED_DIR / "matches.db"
     save_to_sqlite(featured, db_path)